@@ -24,6 +24,10 @@ import sys
 BOARD_WIDTH = 10
 BOARD_HEIGHT = 20
 
+# Mindestgröße des Terminals: Spielfeld mit Rahmen plus Seitenleiste
+MIN_HEIGHT = BOARD_HEIGHT + 3
+MIN_WIDTH = BOARD_WIDTH*2 + 6 + 16
+
 TETROMINOES = {
     'I': [[0,0,0,0], [1,1,1,1], [0,0,0,0], [0,0,0,0]],
     'J': [[1,0,0],[1,1,1],[0,0,0]],
@@ -44,71 +48,214 @@ COLORS = {
     'Z': 7,
 }
 
+FULL_ROW = (1 << BOARD_WIDTH) - 1
+
+# Zellcodes im Spielfeld: 0 = leer, 1..7 = Form
+SHAPE_ID = {shape: i for i, shape in enumerate(TETROMINOES, 1)}
+
+# Darstellung einer Zelle, Index = belegt
+CELL_STR = (' .', '[]')
+
+
+def _build_rotations():
+    rotations = {}
+    for shape, matrix in TETROMINOES.items():
+        states = [tuple(tuple(row) for row in matrix)]
+        for _ in range(3):
+            states.append(tuple(zip(*states[-1][::-1])))
+        rotations[shape] = tuple(states)
+    return rotations
+
+
+# Alle 4 Ausrichtungen pro Form (Index = Drehungen im Uhrzeigersinn)
+ROTATIONS = _build_rotations()
+
+
+def _row_masks(matrix):
+    # (left, top, masks): Offset der ersten belegten Spalte/Zeile und die
+    # belegten Zeilen als Bitmasken (Bit 0 = Spalte `left`).
+    cells = [(r, c) for r, row in enumerate(matrix) for c, v in enumerate(row) if v]
+    left = min(c for _, c in cells)
+    top = min(r for r, _ in cells)
+    bottom = max(r for r, _ in cells)
+    masks = [0] * (bottom - top + 1)
+    for r, c in cells:
+        masks[r - top] |= 1 << (c - left)
+    return left, top, tuple(masks)
+
+
+# Pro Form und Rotation die Zeilen-Bitmasken
+PIECE_MASKS = {
+    shape: tuple(_row_masks(matrix) for matrix in states)
+    for shape, states in ROTATIONS.items()
+}
+
+
+def _build_shifted_masks():
+    shifted = {}
+    for shape, states in PIECE_MASKS.items():
+        per_rot = []
+        for left, top, masks in states:
+            width = max(m.bit_length() for m in masks)
+            by_x = {x - left: tuple(m << x for m in masks)
+                    for x in range(BOARD_WIDTH - width + 1)}
+            per_rot.append((top, by_x))
+        shifted[shape] = tuple(per_rot)
+    return shifted
+
+
+def _build_profiles():
+    profiles = {}
+    for shape, states in ROTATIONS.items():
+        per_rot = []
+        for matrix in states:
+            per_rot.append(tuple(
+                (c, max(r for r, row in enumerate(matrix) if row[c]))
+                for c in range(len(matrix[0]))
+                if any(row[c] for row in matrix)
+            ))
+        profiles[shape] = tuple(per_rot)
+    return profiles
+
+
+# Unterkante pro Ausrichtung: (Spalte, unterste belegte Zeile) relativ
+# zu piece.x/piece.y für jede belegte Spalte
+PROFILES = _build_profiles()
+
+
+# SHIFTED_MASKS[Form][Rotation] = (top, {piece.x: Masken}), nur für
+# Positionen, an denen der Stein horizontal ins Feld passt
+SHIFTED_MASKS = _build_shifted_masks()
+
+# Wall-Kicks nach SRS, (dx, dy) mit y nach oben wie in der Spezifikation
+_SRS_KICKS = {
+    (0, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (1, 0): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (1, 2): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (2, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (2, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (3, 2): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (3, 0): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (0, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+}
+_SRS_KICKS_I = {
+    (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (1, 0): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+    (2, 1): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (2, 3): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+    (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+    (3, 0): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+}
+
+
+def _build_kicks():
+    kicks = {}
+    for shape in TETROMINOES:
+        for (a, b), tests in _SRS_KICKS.items():
+            if shape == 'O':
+                tests = ((0, 0),)
+            elif shape == 'I':
+                tests = _SRS_KICKS_I[a, b]
+            # Spielfeld-y zeigt nach unten
+            kicks[shape, a, b] = tuple((dx, -dy) for dx, dy in tests)
+    return kicks
+
+
+# KICKS[(Form, von, nach)] = zu testende Verschiebungen in Reihenfolge
+KICKS = _build_kicks()
+
 
 class Piece:
+    __slots__ = ('shape', 'rot', 'x', 'y')
+
     def __init__(self, shape):
         self.shape = shape
-        self.matrix = [row[:] for row in TETROMINOES[shape]]
-        self.h = len(self.matrix)
-        self.w = len(self.matrix[0])
-        self.x = (BOARD_WIDTH - self.w) // 2
+        self.rot = 0
+        self.x = (BOARD_WIDTH - len(TETROMINOES[shape][0])) // 2
         self.y = 0
 
+    @property
+    def matrix(self):
+        return ROTATIONS[self.shape][self.rot]
+
     def rotate(self):
-        self.matrix = [list(row) for row in zip(*self.matrix[::-1])]
-        self.h = len(self.matrix)
-        self.w = len(self.matrix[0])
+        self.rot = (self.rot + 1) & 3
 
     def rotate_ccw(self):
-        self.matrix = [list(row) for row in zip(*self.matrix)][::-1]
-        self.h = len(self.matrix)
-        self.w = len(self.matrix[0])
+        self.rot = (self.rot - 1) & 3
 
 
 class Game:
     def __init__(self, stdscr):
         self.stdscr = stdscr
-        self.board = [[0]*BOARD_WIDTH for _ in range(BOARD_HEIGHT)]
+        # Belegung als Bitmaske pro Zeile, `board` nur noch für die Farben:
+        # ein flacher Puffer mit Zellcodes, Index r*BOARD_WIDTH + c
+        self.rows = [0]*BOARD_HEIGHT
+        self.board = bytearray(BOARD_WIDTH*BOARD_HEIGHT)
+        # Oberste belegte Zeile je Spalte, BOARD_HEIGHT = leer
+        self.col_top = [BOARD_HEIGHT]*BOARD_WIDTH
         self.score = 0
         self.lines = 0
         self.level = 1
         self.drop_delay = 1.0
-        self.bag = []
+        # 7-Bag: fester Satz Formen, wird in place gemischt und per Index gezogen
+        self.rng = random.Random()
+        self.shuffle_bag = self.rng.shuffle
+        self.bag = list(TETROMINOES)
+        self.bag_pos = len(self.bag)
         self.current = self.next_piece()
         self.next = self.next_piece()
         self.game_over = False
         self.paused = False
         self.last_drop = time.time()
+        # Farbattribute einmal auflösen statt pro Zelle und Frame, Index = Zellcode
+        self.code_attr = (0,) + tuple(curses.color_pair(COLORS[shape]) for shape in SHAPE_ID)
+        self.draw_frame()
 
     def next_piece(self):
-        if not self.bag:
-            self.bag = list(TETROMINOES.keys())
-            random.shuffle(self.bag)
-        shape = self.bag.pop()
+        if self.bag_pos == len(self.bag):
+            self.shuffle_bag(self.bag)
+            self.bag_pos = 0
+        shape = self.bag[self.bag_pos]
+        self.bag_pos += 1
         return Piece(shape)
 
     def valid(self, piece, nx=None, ny=None):
-        x = piece.x if nx is None else nx
-        y = piece.y if ny is None else ny
-        for r in range(piece.h):
-            for c in range(piece.w):
-                if piece.matrix[r][c]:
-                    bx = x + c
-                    by = y + r
-                    if bx < 0 or bx >= BOARD_WIDTH or by < 0 or by >= BOARD_HEIGHT:
-                        return False
-                    if self.board[by][bx]:
-                        return False
+        top, by_x = SHIFTED_MASKS[piece.shape][piece.rot]
+        masks = by_x.get(piece.x if nx is None else nx)
+        if masks is None:
+            return False
+        y = (piece.y if ny is None else ny) + top
+        if y < 0 or y + len(masks) > BOARD_HEIGHT:
+            return False
+        rows = self.rows
+        for m in masks:
+            if rows[y] & m:
+                return False
+            y += 1
         return True
 
     def lock_piece(self, piece):
-        for r in range(piece.h):
-            for c in range(piece.w):
-                if piece.matrix[r][c]:
-                    bx = piece.x + c
-                    by = piece.y + r
-                    if 0 <= by < BOARD_HEIGHT and 0 <= bx < BOARD_WIDTH:
-                        self.board[by][bx] = piece.shape
+        top, by_x = SHIFTED_MASKS[piece.shape][piece.rot]
+        y = piece.y + top
+        code = SHAPE_ID[piece.shape]
+        rows = self.rows
+        board = self.board
+        col_top = self.col_top
+        for m in by_x[piece.x]:
+            rows[y] |= m
+            base = y*BOARD_WIDTH
+            # Nur über die gesetzten Bits laufen (niedrigstes Bit zuerst)
+            while m:
+                low = m & -m
+                c = low.bit_length() - 1
+                board[base + c] = code
+                if y < col_top[c]:
+                    col_top[c] = y
+                m ^= low
+            y += 1
         self.clear_lines()
         self.current = self.next
         self.next = self.next_piece()
@@ -116,123 +263,233 @@ class Game:
             self.game_over = True
 
     def clear_lines(self):
-        new_board = [row for row in self.board if any(cell == 0 for cell in row)]
-        cleared = BOARD_HEIGHT - len(new_board)
-        if cleared:
-            for _ in range(cleared):
-                new_board.insert(0, [0]*BOARD_WIDTH)
-            self.board = new_board
+        rows = self.rows
+        # Bit r gesetzt = Zeile r ist voll
+        full_mask = 0
+        for r in range(BOARD_HEIGHT):
+            if rows[r] == FULL_ROW:
+                full_mask |= 1 << r
+        if full_mask:
+            # Ab der untersten vollen Zeile nach oben verdichten: nicht volle
+            # Zeilen rutschen an die Schreibposition w, darüber wird aufgefüllt
+            board = self.board
+            w = full_mask.bit_length() - 1
+            for r in range(w, -1, -1):
+                if not full_mask & (1 << r):
+                    rows[w] = rows[r]
+                    board[w*BOARD_WIDTH:(w+1)*BOARD_WIDTH] = board[r*BOARD_WIDTH:(r+1)*BOARD_WIDTH]
+                    w -= 1
+            cleared = bin(full_mask).count('1')
+            for r in range(cleared):
+                rows[r] = 0
+            board[:cleared*BOARD_WIDTH] = bytes(cleared*BOARD_WIDTH)
+            # Spaltenhöhen neu bestimmen: von oben die erste Zeile je Spalte
+            col_top = self.col_top
+            col_top[:] = [BOARD_HEIGHT]*BOARD_WIDTH
+            seen = 0
+            for r in range(cleared, BOARD_HEIGHT):
+                new = rows[r] & ~seen
+                while new:
+                    low = new & -new
+                    col_top[low.bit_length() - 1] = r
+                    new ^= low
+                seen |= rows[r]
+                if seen == FULL_ROW:
+                    break
             self.lines += cleared
             self.score += (cleared * 100) * self.level
             self.level = 1 + self.lines // 10
             self.drop_delay = max(0.05, 1.0 - (self.level-1)*0.05)
 
     def hard_drop(self):
-        while self.valid(self.current, ny=self.current.y+1):
-            self.current.y += 1
-            self.score += 2
-        self.lock_piece(self.current)
+        p = self.current
+        x = p.x
+        start = p.y
+        col_top = self.col_top
+        # Landeposition direkt aus den Spaltenhöhen
+        y = min(col_top[x + c] - bottom for c, bottom in PROFILES[p.shape][p.rot]) - 1
+        if y < start:
+            # Stein steckt unter einem Überhang, dort hilft col_top nicht
+            y = start
+            while self.valid(p, ny=y+1):
+                y += 1
+        self.score += 2 * (y - start)
+        p.y = y
+        self.lock_piece(p)
 
     def step(self):
+        # True, wenn sich der Spielzustand geändert hat
         if self.paused or self.game_over:
-            return
+            return False
         now = time.time()
         if now - self.last_drop >= self.drop_delay:
-            if self.valid(self.current, ny=self.current.y+1):
-                self.current.y += 1
+            p = self.current
+            if self.valid(p, ny=p.y+1):
+                p.y += 1
             else:
-                self.lock_piece(self.current)
+                self.lock_piece(p)
             self.last_drop = now
+            return True
+        return False
 
     def rotate_current(self, ccw=False):
-        old_matrix = [row[:] for row in self.current.matrix]
-        old_w, old_h = self.current.w, self.current.h
+        p = self.current
+        old_rot = p.rot
         if ccw:
-            self.current.rotate_ccw()
+            p.rotate_ccw()
         else:
-            self.current.rotate()
-        for dx in (0, -1, 1, -2, 2):
-            if self.valid(self.current, nx=self.current.x+dx):
-                self.current.x += dx
+            p.rotate()
+        for dx, dy in KICKS[p.shape, old_rot, p.rot]:
+            if self.valid(p, nx=p.x+dx, ny=p.y+dy):
+                p.x += dx
+                p.y += dy
                 return
-        self.current.matrix = old_matrix
-        self.current.w, self.current.h = old_w, old_h
+        p.rot = old_rot
 
     def move_current(self, dx):
-        if self.valid(self.current, nx=self.current.x+dx):
-            self.current.x += dx
+        p = self.current
+        if self.valid(p, nx=p.x+dx):
+            p.x += dx
 
     def soft_drop(self):
-        if self.valid(self.current, ny=self.current.y+1):
-            self.current.y += 1
+        p = self.current
+        if self.valid(p, ny=p.y+1):
+            p.y += 1
             self.score += 1
         else:
-            self.lock_piece(self.current)
+            self.lock_piece(p)
 
-    def draw(self):
+    def draw_frame(self):
+        # Rahmen und Beschriftungen ändern sich nie, daher nur einmal zeichnen
+        # (und erneut, wenn sich die Terminalgröße ändert)
         s = self.stdscr
         s.clear()
+        self.screen_size = s.getmaxyx()
+        max_y, max_x = self.screen_size
+        self.too_small = max_y < MIN_HEIGHT or max_x < MIN_WIDTH
+        if self.too_small:
+            try:
+                s.addnstr(0, 0, 'Terminal too small', max_x - 1)
+            except curses.error:
+                pass
+            s.refresh()
+            return
         top = 1
         left = 2
         for r in range(BOARD_HEIGHT+2):
             s.addstr(top + r, left-2, '|')
             s.addstr(top + r, left + BOARD_WIDTH*2, '|')
         s.addstr(top+BOARD_HEIGHT+1, left-1, '-' * (BOARD_WIDTH*2+1))
+        s.addstr(1, left + BOARD_WIDTH*2 + 4, 'Next:')
+        # Was aktuell auf dem Bildschirm steht, 0xFF = unbekannt
+        self.shadow = [b'\xff'*BOARD_WIDTH for _ in range(BOARD_HEIGHT)]
+        self.shown_next = None
+        self.shown_score = None
+        self.shown_lines = None
+        self.shown_level = None
+        self.shown_paused = None
 
+    def draw(self):
+        s = self.stdscr
+        # Größe einmal pro Frame prüfen, danach passt jeder addstr
+        if s.getmaxyx() != self.screen_size:
+            self.draw_frame()
+        if self.too_small:
+            return
+        addstr = s.addstr
+        code_attr = self.code_attr
+        board = self.board
+        top = 1
+        left = 2
+        panel = left + BOARD_WIDTH*2 + 4
+
+        # Nur Zeilen mit dem fallenden Stein werden kopiert
+        frame_rows = {}
+        p = self.current
+        px = p.x
+        py = p.y
+        code = SHAPE_ID[p.shape]
+        for r, line in enumerate(p.matrix):
+            by = py + r
+            if not 0 <= by < BOARD_HEIGHT:
+                continue
+            for c, filled in enumerate(line):
+                if filled:
+                    if by not in frame_rows:
+                        frame_rows[by] = board[by*BOARD_WIDTH:(by+1)*BOARD_WIDTH]
+                    frame_rows[by][px + c] = code
+
+        # Farbige Läufe je Zellcode sammeln, geschrieben wird danach mit
+        # einem attron/attroff-Paar pro Farbe
+        colored = {}
         for r in range(BOARD_HEIGHT):
-            for c in range(BOARD_WIDTH):
-                cell = self.board[r][c]
+            row = frame_rows.get(r)
+            if row is None:
+                row = board[r*BOARD_WIDTH:(r+1)*BOARD_WIDTH]
+            shadow = self.shadow[r]
+            if row == shadow:
+                continue
+            # Ab jeder geänderten Zelle den Lauf gleicher Zellen mit einem
+            # einzigen addstr schreiben
+            c = 0
+            while c < BOARD_WIDTH:
+                cell = row[c]
+                if cell == shadow[c]:
+                    c += 1
+                    continue
+                end = c + 1
+                while end < BOARD_WIDTH and row[end] == cell:
+                    end += 1
+                text = CELL_STR[cell != 0] * (end - c)
                 if cell:
-                    color = COLORS.get(cell, 1)
-                    try:
-                        s.attron(curses.color_pair(color))
-                        s.addstr(top + r, left + c*2, '[]')
-                        s.attroff(curses.color_pair(color))
-                    except curses.error:
-                        s.addstr(top + r, left + c*2, '[]')
+                    if cell not in colored:
+                        colored[cell] = []
+                    colored[cell].append((top + r, left + c*2, text))
                 else:
-                    s.addstr(top + r, left + c*2, ' .')
+                    addstr(top + r, left + c*2, text)
+                c = end
+            self.shadow[r] = row
 
-        p = self.current
-        for r in range(p.h):
-            for c in range(p.w):
-                if p.matrix[r][c]:
-                    by = top + p.y + r
-                    bx = left + (p.x + c)*2
-                    if 0 <= by < top + BOARD_HEIGHT:
-                        try:
-                            s.attron(curses.color_pair(COLORS.get(p.shape,1)))
-                            s.addstr(by, bx, '[]')
-                            s.attroff(curses.color_pair(COLORS.get(p.shape,1)))
-                        except curses.error:
-                            s.addstr(by, bx, '[]')
+        for cell, runs in colored.items():
+            attr = code_attr[cell]
+            s.attron(attr)
+            for y, x, text in runs:
+                addstr(y, x, text)
+            s.attroff(attr)
 
-        s.addstr(1, left + BOARD_WIDTH*2 + 4, 'Next:')
         np = self.next
-        for r in range(np.h):
-            for c in range(np.w):
-                if np.matrix[r][c]:
-                    try:
-                        s.attron(curses.color_pair(COLORS.get(np.shape,1)))
-                        s.addstr(2 + r, left + BOARD_WIDTH*2 + 4 + c*2, '[]')
-                        s.attroff(curses.color_pair(COLORS.get(np.shape,1)))
-                    except curses.error:
-                        s.addstr(2 + r, left + BOARD_WIDTH*2 + 4 + c*2, '[]')
-
-        s.addstr(8, left + BOARD_WIDTH*2 + 4, f'Score: {self.score}')
-        s.addstr(9, left + BOARD_WIDTH*2 + 4, f'Lines: {self.lines}')
-        s.addstr(10, left + BOARD_WIDTH*2 + 4, f'Level: {self.level}')
-        if self.paused:
-            s.addstr(12, left + BOARD_WIDTH*2 + 4, 'PAUSED')
+        if np is not self.shown_next:
+            for r in range(4):
+                addstr(2 + r, panel, ' ' * 8)
+            attr = code_attr[SHAPE_ID[np.shape]]
+            s.attron(attr)
+            for r, line in enumerate(np.matrix):
+                for c, filled in enumerate(line):
+                    if filled:
+                        addstr(2 + r, panel + c*2, '[]')
+            s.attroff(attr)
+            self.shown_next = np
+
+        if self.score != self.shown_score:
+            addstr(8, panel, f'Score: {self.score}')
+            self.shown_score = self.score
+        if self.lines != self.shown_lines:
+            addstr(9, panel, f'Lines: {self.lines}')
+            self.shown_lines = self.lines
+        if self.level != self.shown_level:
+            addstr(10, panel, f'Level: {self.level}')
+            self.shown_level = self.level
+        if self.paused != self.shown_paused:
+            addstr(12, panel, 'PAUSED' if self.paused else ' ' * 6)
+            self.shown_paused = self.paused
         if self.game_over:
-            s.addstr(14, left + BOARD_WIDTH*2 + 4, 'GAME OVER')
-            s.addstr(15, left + BOARD_WIDTH*2 + 4, 'Press q to quit')
+            addstr(14, panel, 'GAME OVER')
+            addstr(15, panel, 'Press q to quit')
         s.refresh()
 
 
 def main(stdscr):
     curses.curs_set(0)
-    stdscr.nodelay(True)
     stdscr.keypad(True)
 
     # Farben sicher initialisieren
@@ -251,17 +508,25 @@ def main(stdscr):
             pass
 
     game = Game(stdscr)
+    game.draw()
 
     while True:
         try:
             if game.game_over:
-                game.draw()
+                stdscr.timeout(-1)
                 ch = stdscr.getch()
                 if ch in (ord('q'), ord('Q')):
                     break
-                time.sleep(0.05)
+                if ch == curses.KEY_RESIZE:
+                    game.draw()
                 continue
 
+            # getch() blockiert bis zum nächsten Tastendruck oder Fall-Schritt
+            if game.paused:
+                stdscr.timeout(-1)
+            else:
+                wait_ms = max(1, int((game.last_drop + game.drop_delay - time.time())*1000))
+                stdscr.timeout(wait_ms)
             ch = stdscr.getch()
             if ch != -1:
                 if ch in (curses.KEY_LEFT, ord('h')):
@@ -281,9 +546,8 @@ def main(stdscr):
                 elif ch in (ord('q'), ord('Q')):
                     break
 
-            game.step()
-            game.draw()
-            time.sleep(0.01)
+            if game.step() or ch != -1:
+                game.draw()
         except KeyboardInterrupt:
             break
 